@@ -1,25 +1,25 @@
 from base64 import b64encode, b64decode
-from coloraide import Color
-from colorsys import rgb_to_hls
+from collections import OrderedDict
+from colorsys import hls_to_rgb, rgb_to_hls
 from functools import lru_cache, partial
-from typing import Callable, Optional, Tuple
-from .lib import png
-import io
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 import os
 import re
-import requests
 import struct
 import sublime
 import sublime_plugin
 import subprocess
+import threading
 import urllib.parse
+import zlib
 
 # To turn on debug logging:
 # Python 3.3>>> import logging
 # Python 3.3>>> logging.getLogger().setLevel(logging.DEBUG)
 
 ST_VERSION = int(sublime.version())
+IS_WINDOWS = sublime.platform() == 'windows'
 SETTINGS_FILE = 'QuickView.sublime-settings'
 
 EM_SCALE_FACTOR = 1/8.4  # this means the following pixel values correspond to a layout with view.em_width() == 8.4
@@ -40,13 +40,36 @@ SCOPE_SELECTOR_SASS_VARIABLE_REFERENCE = 'meta.property-value variable.other.sas
 SCOPE_SELECTOR_LESS_VARIABLE_DEFINITION = 'variable.declaration.less'  # LESS package
 SCOPE_SELECTOR_LESS_VARIABLE_REFERENCE = 'meta.property-value variable.other.less'  # LESS package
 SCOPE_SELECTOR_SUBLIME_COLOR_SCHEME_VARIABLE_REFERENCE = 'meta.color.sublime-color-scheme meta.function-call.var variable.other'  # PackageDev .sublime-color-scheme syntax
-
-COLOR_START_PATTERN = re.compile(r'(?i)(?:\b(?<![-#&$])(?:color|hsla?|lch|lab|hwb|rgba?)\(|\b(?<![-#&$])[\w]{3,}(?![(-])\b|(?<![&])#)')
-COLOR_FUNCTION_PATTERN = re.compile(r'(?i)(?:\b(?<![-#&$])(?:color|hsla?|lch|lab|hwb|rgba?)\([^)]+\))')
-IMAGE_URI_PATTERN = re.compile(r'\bdata:image/(?:png|jpeg|gif|png|svg\+xml|webp|avif)(;base64)?,[A-Za-z0-9+/=]+|\bhttps?://[A-Za-z0-9\-\._~:/?#\[\]@!$&\'()*+,;%=]+\b|(?:[A-Za-z]:)?[^\s:*?"<>|]+\.(?:png|jpg|jpeg|gif|bmp|svg|webp|avif)\b')
+SCOPE_SELECTOR_URI_BEGIN_PUNCTUATION = 'punctuation.definition.string.begin | punctuation.definition.link.begin'
+SCOPE_SELECTOR_URI_END_PUNCTUATION = 'punctuation.definition.string.end | punctuation.definition.link.end'
+
+COLOR_START_PATTERN = re.compile(r'(?:\b(?<![-#&$])(?:color|hsla?|lch|lab|hwb|rgba?)\(|\b(?<![-#&$])[\w]{3,}(?![(-])\b|(?<![&])#)', re.IGNORECASE)
+COLOR_FUNCTION_PATTERN = re.compile(r'(?:\b(?<![-#&$])(?:color|hsla?|lch|lab|hwb|rgba?)\([^)]+\))', re.IGNORECASE)
+# patterns for the most common CSS color formats, which can be parsed without coloraide
+_NUM = r'([-+]?(?:\d+(?:\.\d*)?|\.\d+))'
+# legacy syntax with commas as separators, and modern syntax with whitespace and a slash before the alpha value
+_RGB_TEMPLATE = r'rgba?\(\s*{num}(%?){sep}{num}(%?){sep}{num}(%?)(?:{alpha_sep}{num}(%?))?\s*\)'
+_HSL_TEMPLATE = r'hsla?\(\s*{num}(?:deg)?{sep}{num}%{sep}{num}%(?:{alpha_sep}{num}(%?))?\s*\)'
+_LEGACY_SEPARATORS = {'sep': r'\s*,\s*', 'alpha_sep': r'\s*,\s*'}
+_MODERN_SEPARATORS = {'sep': r'\s+', 'alpha_sep': r'\s*/\s*'}
+HEX_COLOR_PATTERN = re.compile(r'#(?:[0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3,4})\b')
+RGB_COLOR_PATTERNS = tuple(re.compile(_RGB_TEMPLATE.format(num=_NUM, **separators), re.IGNORECASE) for separators in (_LEGACY_SEPARATORS, _MODERN_SEPARATORS))
+HSL_COLOR_PATTERNS = tuple(re.compile(_HSL_TEMPLATE.format(num=_NUM, **separators), re.IGNORECASE) for separators in (_LEGACY_SEPARATORS, _MODERN_SEPARATORS))
+IMAGE_URI_PATTERN = re.compile(r'\bdata:image/(?:png|jpeg|gif|svg\+xml|webp|avif)(;base64)?,[A-Za-z0-9+/=]+|\bhttps?://[A-Za-z0-9\-\._~:/?#\[\]@!$&\'()*+,;%=]+\b|(?:[A-Za-z]:|(?<![^\s:*?"<>|]))[^\s:*?"<>|]+\.(?:png|jpg|jpeg|gif|bmp|svg|webp|avif)\b')
+# at least one of these substrings is contained in every match of IMAGE_URI_PATTERN
+IMAGE_URI_SUBSTRINGS = ('data:image/', '://', '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.svg', '.webp', '.avif')
+# combined pattern to find image URIs and colors within a single pass over the text
+FALLBACK_PATTERN = re.compile('(?P<image>' + IMAGE_URI_PATTERN.pattern + ')|(?P<color>' + COLOR_START_PATTERN.pattern + ')', re.IGNORECASE)
 
 DATA_URI_TEMPLATE = 'data:{};base64,{}'
 
+PNG_SIGNATURE = b'\211PNG\r\n\032\n'
+
+IMAGE_HEADER_SIZE = 31  # number of bytes required to extract the image size for PNG, GIF, BMP and WebP
+JPEG_READ_SIZE = 65536
+DOWNLOAD_CACHE_SIZE = 64 * 1024 * 1024  # maximum total size in bytes of the data URIs of downloaded images which are kept in memory
+HOVER_IMAGE_PREVIEW_DELAY = 80  # milliseconds to wait before loading an image on hover, so that fast mouse movements are coalesced
+
 POPUP_TEMPLATE = '''
     <body id="quick-view">
         <style>
@@ -158,6 +181,8 @@ CONVERTABLE_IMAGE_FORMATS = [
     ImageFormat.AVIF
 ]
 
+SUPPORTED_IMAGE_FORMATS = frozenset(NATIVE_IMAGE_FORMATS + CONVERTABLE_IMAGE_FORMATS)
+
 IGNORED_FILE_EXTENSIONS = ('.html', '.css', '.js', '.json', '.md', '.xml', '.mp3', '.ogv', '.mp4', '.mpeg', '.webm', '.zip', '.tgz')
 
 SUPPORTED_MIME_TYPES = [
@@ -209,13 +234,111 @@ CONVERTER_SETTING = {
     ImageFormat.AVIF: 'avif_converter'
 }
 
+VALID_CONVERTERS = {
+    ImageFormat.SVG: ('inkscape', 'magick'),
+    ImageFormat.WEBP: ('dwebp', 'magick'),
+    ImageFormat.AVIF: ('magick',)
+}
+
+# input file argument for ImageMagick to read image data of the given format from stdin
+MAGICK_STDIN_INPUT = {
+    ImageFormat.SVG: 'svg:-',
+    ImageFormat.WEBP: 'webp:-',
+    ImageFormat.AVIF: 'avif:-'
+}
+
+
+class PackageSettings:
+    """
+    Cached values of the package settings, which are updated whenever the settings change
+    """
+
+    def __init__(self) -> None:
+        self._settings = None  # type: Optional[sublime.Settings]
+        self._preferences = None  # type: Optional[sublime.Settings]
+        self._converter_settings = None  # type: Optional[Tuple[Dict[int, str], bool]]
+
+    def load(self) -> None:
+        self._settings = sublime.load_settings(SETTINGS_FILE)
+        self._settings.add_on_change('quick_view', self.update)
+        self._preferences = sublime.load_settings('Preferences.sublime-settings')
+        self._preferences.add_on_change('quick_view', self.update_preferences)
+        self.update()
+        self.update_preferences()
+
+    def unload(self) -> None:
+        if self._settings:
+            self._settings.clear_on_change('quick_view')
+        if self._preferences:
+            self._preferences.clear_on_change('quick_view')
+
+    def update(self) -> None:
+        settings = self._settings
+        if settings is None:
+            return
+        self.color_preview = settings.get('color_preview', True)
+        self.image_preview = settings.get('image_preview', True)
+        self.image_scope_selector = settings.get('image_scope_selector', '')
+        self.extensionless_image_preview = settings.get('extensionless_image_preview', False)
+        self.path_aliases = settings.get('path_aliases', {})
+        self.converters = {image_format: settings.get(key, '') for image_format, key in CONVERTER_SETTING.items()}
+        self.popup_border_width = settings.get('popup_border_width', 8)
+        self.popup_style = settings.get('popup_style', ['rounded', 'pointer', 'open_image_button'])
+        self.max_payload_size = settings.get('max_payload_size', 8096)
+        self.image_background_pattern = settings.get('image_background_pattern', True)
+        self.converter_timeout = settings.get('converter_timeout', 30) or None
+        # converted images depend on the converter settings and the background pattern
+        converter_settings = (self.converters, self.image_background_pattern)
+        if converter_settings != self._converter_settings:
+            converted_data_uri.cache_clear()
+            converted_file_data_uri_cached.cache_clear()
+            DOWNLOAD_CACHE.clear()
+        self._converter_settings = converter_settings
+
+    def update_preferences(self) -> None:
+        preferences = self._preferences
+        if preferences is None:
+            return
+        self.popup_shadows = preferences.get('popup_shadows', False)
+
+
+SETTINGS = PackageSettings()
+
+
+def plugin_loaded() -> None:
+    SETTINGS.load()
+    # prime the cache with the checkerboard patterns for fully transparent colors
+    for color_scheme_type in ('light', 'dark'):
+        white = BACKGROUND_WHITE_PIXEL[color_scheme_type]
+        black = BACKGROUND_BLACK_PIXEL[color_scheme_type]
+        checkerboard_png(white, white, white, black, black, black)
+    # import coloraide in the background, so that the first color preview which needs it doesn't block the UI
+    sublime.set_timeout_async(import_coloraide)
 
+
+def import_coloraide() -> None:
+    try:
+        from coloraide import Color  # pyright: ignore[reportUnusedImport]
+    except ImportError as ex:
+        logging.debug(ex)
+
+
+def plugin_unloaded() -> None:
+    SETTINGS.unload()
+    if http_session.cache_info().currsize:
+        http_session().close()
+
+
+@lru_cache(maxsize=256)
 def format_from_uri(uri: str) -> int:
     """
     Returns the image format for a given URI string based on its file extension
     """
-    _, file_extension = os.path.splitext(uri.lower())
-    return FILE_EXTENSION_FORMAT_MAP.get(file_extension, ImageFormat.UNSUPPORTED)
+    # only the last few characters need to be considered, because the longest file extension is .jpeg
+    dot = uri.rfind('.', max(len(uri) - 5, 0))
+    if dot == -1:
+        return ImageFormat.UNSUPPORTED
+    return FILE_EXTENSION_FORMAT_MAP.get(uri[dot:].lower(), ImageFormat.UNSUPPORTED)
 
 
 def hex2rgba(color: str) -> Tuple[int, int, int, float]:
@@ -223,73 +346,130 @@ def hex2rgba(color: str) -> Tuple[int, int, int, float]:
     Convert hex RGB or RGBA color string into R, G, B, A tuple with integer
     values 0..255 for R, G, B and floating point value [0, 1] for A
     """
-    if len(color) == 4:  # 3-digit RGB
-        r = int(color[1] * 2, 16)
-        g = int(color[2] * 2, 16)
-        b = int(color[3] * 2, 16)
-        a = 1.0
-    if len(color) == 5:  # 4-digit RGBA
-        r = int(color[1] * 2, 16)
-        g = int(color[2] * 2, 16)
-        b = int(color[3] * 2, 16)
-        a = int(color[4] * 2, 16) / 255
-    elif len(color) == 7:  # 6-digit RGB
-        r = int(color[1:3], 16)
-        g = int(color[3:5], 16)
-        b = int(color[5:7], 16)
-        a = 1.0
-    elif len(color) == 9:  # 8-digit RGBA
-        r = int(color[1:3], 16)
-        g = int(color[3:5], 16)
-        b = int(color[5:7], 16)
-        a = int(color[7:9], 16) / 255
+    if len(color) in (4, 5):  # 3-digit RGB or 4-digit RGBA
+        digits = ''.join(digit * 2 for digit in color[1:])
+    elif len(color) in (7, 9):  # 6-digit RGB or 8-digit RGBA
+        digits = color[1:]
     else:
         raise ValueError('invalid color ' + color)
-    return r, g, b, a
+    if len(digits) == 6:
+        digits += 'ff'
+    r, g, b, a = bytes.fromhex(digits)
+    return r, g, b, a / 255
+
+
+def parse_alpha(value: Optional[str], percent: str) -> float:
+    if value is None:
+        return 1.0
+    a = float(value) / 100 if percent else float(value)
+    return min(max(a, 0.0), 1.0)
 
 
+def parse_color(string: str, start: int = 0) -> Optional[Tuple[Tuple[int, int, int, float], int]]:
+    """
+    Parse a color in hex, rgb(), rgba(), hsl() or hsla() notation at the given position,
+    without the overhead of creating a coloraide Color object. Returns the R, G, B, A tuple
+    and the end position of the color, or None if no color of these formats was found.
+    """
+    m = HEX_COLOR_PATTERN.match(string, start)
+    if m:
+        return hex2rgba(m.group()), m.end()
+    for pattern in RGB_COLOR_PATTERNS:
+        m = pattern.match(string, start)
+        if m:
+            r, rp, g, gp, b, bp, a, ap = m.groups()
+            if rp != gp or rp != bp:  # mixed numbers and percentages
+                return None
+            divisor = 100 if rp else 255
+            red, green, blue = (int(255 * float(val) / divisor) for val in (r, g, b))
+            return (red, green, blue, parse_alpha(a, ap)), m.end()
+    for pattern in HSL_COLOR_PATTERNS:
+        m = pattern.match(string, start)
+        if m:
+            h, s, l, a, ap = m.groups()
+            saturation = min(max(float(s) / 100, 0.0), 1.0)
+            lightness = min(max(float(l) / 100, 0.0), 1.0)
+            red, green, blue = hls_to_rgb(float(h) / 360 % 1, lightness, saturation)
+            return (int(255 * red), int(255 * green), int(255 * blue), parse_alpha(a, ap)), m.end()
+    return None
+
+
+@lru_cache(maxsize=8)
+def color_scheme_type_from_background(background: str) -> str:
+    """
+    Returns 'dark' or 'light' depending on the lightness of the given background color, see
+    https://www.sublimetext.com/docs/minihtml.html#predefined_classes
+    """
+    r, g, b, _ = hex2rgba(background)
+    _, lightness, _ = rgb_to_hls(r/255, g/255, b/255)
+    return 'dark' if lightness < 0.5 else 'light'
+
+
+def srgb_tuple(color: 'Color') -> Tuple[int, int, int, float]:  # pyright: ignore[reportUndefinedVariable]
+    """
+    Convert a coloraide Color object into R, G, B, A tuple in the sRGB color space
+    """
+    color.convert('srgb', in_place=True)
+    return int(255 * color['red']), int(255 * color['green']), int(255 * color['blue']), color['alpha']
+
+
+@lru_cache(maxsize=256)
 def match_color(string: str, start: int = 0, fullmatch: bool = False) -> Optional[Tuple[int, int, int, float]]:
+    """
+    Match a color at the given position and return the R, G, B, A tuple, or None if no valid
+    color was found. The result is cached, because the same colors usually appear repeatedly.
+    """
+    result = parse_color(string, start)
+    if result is not None and (not fullmatch or result[1] == len(string)):
+        return result[0]
+    from coloraide import Color  # imported lazily, because coloraide is slow to load
     # https://facelessuser.github.io/coloraide/color/#color-matching
     mcolor = Color.match(string, start=start, fullmatch=fullmatch)
-    if mcolor is not None:
-        mcolor.color.convert('srgb', in_place=True)
-        r = int(255 * mcolor.color['red'])
-        g = int(255 * mcolor.color['green'])
-        b = int(255 * mcolor.color['blue'])
-        a = mcolor.color['alpha']
-        return r, g, b, a
-    else:
+    return srgb_tuple(mcolor.color) if mcolor is not None else None
+
+
+def find_color(string: str, start: int) -> Optional[Tuple[Tuple[int, int, int, float], int]]:
+    """
+    Match a color at the given position and return the R, G, B, A tuple and the end position
+    of the color, or None if no valid color was found
+    """
+    result = parse_color(string, start)
+    if result is not None:
+        return result
+    from coloraide import Color
+    mcolor = Color.match(string, start=start)
+    if mcolor is None:
         return None
+    return srgb_tuple(mcolor.color), mcolor.end
+
+
+def png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """
+    Assemble a PNG chunk consisting of length, chunk type, chunk data and CRC
+    """
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff)
+
+
+# 40x40 pixels, bit depth 1, color type 3 (indexed-color), default compression, filter and interlace methods
+CHECKERBOARD_PNG_HEAD = PNG_SIGNATURE + png_chunk(b'IHDR', struct.pack('>IIBBBBB', 40, 40, 1, 3, 0, 0, 0))
+# the pixel data only contains palette indices (0 for light, 1 for dark squares), so it is the
+# same for all colors; each scanline is prefixed with filter type 0 (None)
+CHECKERBOARD_PNG_IDAT = png_chunk(b'IDAT', zlib.compress(
+    (b'\0\xf8\x3e\x0f\x83\xe0' * 5 + b'\0\x07\xc1\xf0\x7c\x1f' * 5) * 4, 9))
+PNG_IEND = png_chunk(b'IEND', b'')
 
 
-@lru_cache(maxsize=128)
+@lru_cache(maxsize=256)
 def checkerboard_png(r1: int, g1: int, b1: int, r2: int, g2: int, b2: int) -> str:
     """
-    Generate a base64 encoded PNG image with sidelength 40px of a checkerboard pattern with
+    Generate a data URI of a PNG image with sidelength 40px of a checkerboard pattern with
     color rgb(r1, g1, b1) for the light pixels and color rgb(r2, g2, b2) for the dark pixels.
     The result for given input values is cached to avoid unnecessary calculations for the
     same input values.
     """
-    pixels = list()
-    row_type1 = list()
-    row_type2 = list()
-    for _ in range(4):
-        row_type1.extend([r2, g2, b2] * 5)
-        row_type1.extend([r1, g1, b1] * 5)
-    for _ in range(4):
-        row_type2.extend([r1, g1, b1] * 5)
-        row_type2.extend([r2, g2, b2] * 5)
-    row_type1 = tuple(row_type1)
-    row_type2 = tuple(row_type2)
-    for _ in range(4):
-        for _ in range(5):
-            pixels.append(row_type1)
-        for _ in range(5):
-            pixels.append(row_type2)
-    data = io.BytesIO()
-    png.Writer(width=40, height=40, greyscale=False).write(data, pixels)  # pyright: ignore[reportGeneralTypeIssues]
-    data.seek(0)
-    return b64encode(data.getvalue()).decode('ascii')
+    plte = png_chunk(b'PLTE', bytes((r1, g1, b1, r2, g2, b2)))
+    data = CHECKERBOARD_PNG_HEAD + plte + CHECKERBOARD_PNG_IDAT + PNG_IEND
+    return DATA_URI_TEMPLATE.format(MimeType.PNG, b64encode(data).decode('ascii'))
 
 
 def scale_image(width: int, height: int, device_scale_factor: float) -> Tuple[int, int]:
@@ -313,24 +493,88 @@ def image_size_label(width: int, height: int) -> str:
     return '{} \u00d7 {} pixels'.format(width, height) if width != -1 else 'unknown size'
 
 
-@lru_cache(maxsize=16)
+@lru_cache(maxsize=None)
+def http_session() -> 'requests.Session':  # pyright: ignore[reportUndefinedVariable]
+    """
+    Shared HTTP session, so that connections can be reused for image downloads from the same host
+    """
+    import requests  # imported lazily, because it is only needed for image previews of URLs
+    session = requests.Session()
+    session.headers['User-Agent'] = 'Sublime Text QuickView plugin'
+    session.headers['Accept'] = 'image/*'
+    return session
+
+
+class DownloadCache:
+    """
+    Least recently used cache for the data URIs of downloaded images, which is limited by their
+    total size instead of the number of entries, because a single image can be several MB large
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # type: OrderedDict[str, Tuple[str, int, int]]
+        self._lock = threading.Lock()
+
+    def get(self, url: str) -> Optional[Tuple[str, int, int]]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def put(self, url: str, entry: Tuple[str, int, int]) -> None:
+        size = len(entry[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old_entry = self._entries.pop(url, None)
+            if old_entry is not None:
+                self.total_bytes -= len(old_entry[0])
+            while self._entries and self.total_bytes + size > self.max_bytes:
+                _, (data_uri, _, _) = self._entries.popitem(last=False)
+                self.total_bytes -= len(data_uri)
+            self._entries[url] = entry
+            self.total_bytes += size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+DOWNLOAD_CACHE = DownloadCache(DOWNLOAD_CACHE_SIZE)
+
+
 def request_img(url: str) -> Tuple[Optional[str], Optional[bytes]]:
+    import requests
     try:
-        headers = {'User-Agent': 'Sublime Text QuickView plugin'}
-        r = requests.get(url, headers=headers, timeout=2)
-        if not r.status_code == requests.codes.ok:
-            r.raise_for_status()
-        content_length = int(r.headers.get('content-length', 0))
-        # if content_length == 0:
-        #     raise ValueError('empty payload')
-        if content_length:
-            max_payload_size = sublime.load_settings(SETTINGS_FILE).get('max_payload_size', 8096)
-            if content_length > max_payload_size * 1024:
+        r = http_session().get(url, timeout=2, stream=True)
+        try:
+            if not r.status_code == requests.codes.ok:
+                r.raise_for_status()
+            max_payload_size = SETTINGS.max_payload_size
+            max_bytes = max_payload_size * 1024
+            content_length = int(r.headers.get('content-length', 0))
+            # if content_length == 0:
+            #     raise ValueError('empty payload')
+            if content_length > max_bytes:
                 raise ValueError('refusing to download files larger than {}kB'.format(max_payload_size))
-        mime = r.headers.get('content-type')
-        if mime is None or mime.lower() not in SUPPORTED_MIME_TYPES:
-            raise ValueError('mime type {} is not supported'.format(mime))
-        return mime, r.content
+            mime = r.headers.get('content-type')
+            if mime is None or mime.lower() not in SUPPORTED_MIME_TYPES:
+                raise ValueError('mime type {} is not supported'.format(mime))
+            # don't rely on the content-length header, but stop the download as soon as the limit is exceeded
+            chunks = []
+            received = 0
+            for chunk in r.iter_content(chunk_size=65536):
+                received += len(chunk)
+                if received > max_bytes:
+                    raise ValueError('refusing to download files larger than {}kB'.format(max_payload_size))
+                chunks.append(chunk)
+            return mime, b''.join(chunks)
+        finally:
+            r.close()
     except requests.HTTPError as ex:
         logging.debug(ex)
         return None, None
@@ -339,77 +583,89 @@ def request_img(url: str) -> Tuple[Optional[str], Optional[bytes]]:
         return None, None
 
 
-@lru_cache(maxsize=16)
-def convert_bytes2png(data: bytes, input_format: int, converter: str) -> bytes:
-    if sublime.platform() == 'windows':
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    else:
-        startupinfo = None
+def create_startupinfo() -> Optional['subprocess.STARTUPINFO']:
+    """
+    Prevent a console window from popping up for converter subprocesses on Windows. A new object is
+    required for each subprocess, because subprocess.Popen modifies it on Python versions < 3.7.
+    """
+    if not IS_WINDOWS:
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
+
+
+def converter_args(input_format: int, converter: str, path: Optional[str] = None) -> List[str]:
+    """
+    Returns the command line arguments to convert an image to PNG. If no file path is given,
+    the image data is read from stdin. The PNG data is always written to stdout.
+    """
     if converter == 'inkscape' and input_format == ImageFormat.SVG:
         logging.debug('using Inkscape to convert SVG image')
-        p = subprocess.Popen(
-            ['inkscape', '--pipe', '--export-type=png'],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            startupinfo=startupinfo)
+        if path is None:
+            return ['inkscape', '--pipe', '--export-type=png']
+        return ['inkscape', '--export-type=png', '--export-filename=-', path]
     elif converter == 'dwebp' and input_format == ImageFormat.WEBP:
         logging.debug('using dwebp to convert WebP image')
-        p = subprocess.Popen(
-            ['dwebp', '-o', '-', '--', '-'],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            startupinfo=startupinfo)
-    elif converter == 'magick' and input_format in [ImageFormat.SVG, ImageFormat.WEBP, ImageFormat.AVIF]:
+        return ['dwebp', '-o', '-', '--', '-' if path is None else path]
+    elif converter == 'magick' and input_format in MAGICK_STDIN_INPUT:
         logging.debug('using ImageMagick to convert %s image', IMAGE_FORMAT_NAMES[input_format])
-        fmt = {ImageFormat.SVG: 'svg:-', ImageFormat.WEBP: 'webp:-', ImageFormat.AVIF: 'avif:-'}[input_format]
-        if sublime.load_settings(SETTINGS_FILE).get('image_background_pattern', True):
+        if path is None:
+            path = MAGICK_STDIN_INPUT[input_format]
+        if SETTINGS.image_background_pattern:
             # use checkerboard background pattern for images with transparency
-            p = subprocess.Popen(
-                ['magick', 'composite', '-compose', 'dst-over', '-tile', 'pattern:checkerboard', '-background', 'transparent', fmt, 'png:-'],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                startupinfo=startupinfo)
-        else:
-            p = subprocess.Popen(
-                ['magick', '-background', 'transparent', fmt, 'png:-'],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                startupinfo=startupinfo)
+            return ['magick', 'composite', '-compose', 'dst-over', '-tile', 'pattern:checkerboard', '-background', 'transparent', path, 'png:-']
+        return ['magick', '-background', 'transparent', path, 'png:-']
     else:
         raise ValueError('unknown converter {} or incompatible image format'.format(converter))
-    png, _ = p.communicate(data)
-    p.stdin.close()  # type: ignore
+
+
+def convert_bytes2png(data: bytes, input_format: int, converter: str) -> bytes:
+    p = subprocess.Popen(
+        converter_args(input_format, converter),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        startupinfo=create_startupinfo())
+    try:
+        png, _ = p.communicate(data, timeout=SETTINGS.converter_timeout)
+    except subprocess.TimeoutExpired:
+        p.kill()
+        p.communicate()
+        raise
     return png
 
 
 def convert_file2png(path: str, input_format: int, converter: str) -> bytes:
-    if sublime.platform() == 'windows':
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-    else:
-        startupinfo = None
-    if converter == 'inkscape' and input_format == ImageFormat.SVG:
-        logging.debug('using Inkscape to convert SVG image')
-        png = subprocess.check_output(
-            ['inkscape', '--export-type=png', '--export-filename=-', path],
-            startupinfo=startupinfo)
-    elif converter == 'dwebp' and input_format == ImageFormat.WEBP:
-        logging.debug('using dwebp to convert WebP image')
-        png = subprocess.check_output(['dwebp', '-o', '-', '--', path], startupinfo=startupinfo)
-    elif converter == 'magick' and input_format in [ImageFormat.SVG, ImageFormat.WEBP, ImageFormat.AVIF]:
-        logging.debug('using ImageMagick to convert %s image', IMAGE_FORMAT_NAMES[input_format])
-        if sublime.load_settings(SETTINGS_FILE).get('image_background_pattern', True):
-            png = subprocess.check_output(
-                ['magick', 'composite', '-compose', 'dst-over', '-tile', 'pattern:checkerboard', '-background', 'transparent', path, 'png:-'],
-                startupinfo=startupinfo)
-        else:
-            png = subprocess.check_output(
-                ['magick', '-background', 'transparent', path, 'png:-'],
-                startupinfo=startupinfo)
-    else:
-        raise ValueError('unknown converter {} or incompatible image format'.format(converter))
-    return png
+    return subprocess.check_output(converter_args(input_format, converter, path), startupinfo=create_startupinfo(), timeout=SETTINGS.converter_timeout)
+
+
+@lru_cache(maxsize=16)
+def converted_data_uri(data: bytes, input_format: int, converter: str) -> Tuple[str, int, int]:
+    """
+    Convert image data from a data URI to PNG and return the PNG data URI and the image size
+    """
+    return image_data_uri(MimeType.PNG, convert_bytes2png(data, input_format, converter))
+
+
+def converted_file_data_uri(path: str, input_format: int, converter: str) -> Tuple[str, int, int]:
+    return converted_file_data_uri_cached(path, os.path.getmtime(path), input_format, converter)
+
+
+@lru_cache(maxsize=16)
+def converted_file_data_uri_cached(path: str, mtime: float, input_format: int, converter: str) -> Tuple[str, int, int]:
+    """
+    The modification time of the file is only used as part of the cache key, so that the image
+    is converted again if the file was modified
+    """
+    return image_data_uri(MimeType.PNG, convert_file2png(path, input_format, converter))
+
+
+def image_data_uri(mime: str, data: bytes) -> Tuple[str, int, int]:
+    """
+    Encode image data as data URI and extract the image size
+    """
+    width, height = image_size(data)
+    return DATA_URI_TEMPLATE.format(mime, b64encode(data).decode('ascii')), width, height
 
 
 def image_size(data) -> Tuple[int, int]:
@@ -418,66 +674,113 @@ def image_size(data) -> Tuple[int, int]:
     """
     width = -1
     height = -1
-    if isinstance(data, bytes):
-        data = io.BytesIO(data)
     try:
-        head = data.read(31)
-        size = len(head)
+        head = data[:IMAGE_HEADER_SIZE] if isinstance(data, bytes) else data.read(IMAGE_HEADER_SIZE)
         # JPEG
-        if size >= 2 and head.startswith(b'\377\330'):
-            data.seek(0)
-            size = 2
-            ftype = 0
-            while not 0xc0 <= ftype <= 0xcf or ftype in [0xc4, 0xc8, 0xcc]:
-                data.seek(size, 1)
-                byte = data.read(1)
-                while ord(byte) == 0xff:
-                    byte = data.read(1)
-                ftype = ord(byte)
-                size = struct.unpack('>H', data.read(2))[0] - 2
-            data.seek(1, 1)
-            height, width = struct.unpack('>HH', data.read(4))
-        # PNG
-        elif size >= 24 and head.startswith(b'\211PNG\r\n\032\n') and head[12:16] == b'IHDR':
-            width, height = struct.unpack('>LL', head[16:24])
-        elif size >= 16 and head.startswith(b'\211PNG\r\n\032\n'):
-            width, height = struct.unpack('>LL', head[8:16])
-        # GIF
-        elif size >= 10 and head.startswith((b'GIF87a', b'GIF89a')):
-            width, height = struct.unpack('<HH', head[6:10])
-        # BMP
-        elif size >= 26 and head.startswith(b'BM'):
-            headerSize = struct.unpack('<I', head[14:18])[0]
-            if headerSize == 12:
-                width, height = struct.unpack('<HH', head[18:22])
-            elif headerSize >= 40:
-                width, height = struct.unpack('<ii', head[18:26])
-                height = abs(height)
-            else:
-                raise ValueError('unknown DIB header size: ' + str(headerSize))
-        # WebP
-        elif head.startswith(b'RIFF') and head[8:12] == b'WEBP':
-            if head[12:16] == b'VP8 ':
-                width, height = struct.unpack('<HH', head[26:30])
-            elif head[12:16] == b'VP8X':
-                width = struct.unpack('<I', head[24:27] + b'\0')[0] + 1
-                height = struct.unpack('<I', head[27:30] + b'\0')[0] + 1
-            elif head[12:16] == b'VP8L':
-                b = head[21:25]
-                width = (((b[1] & 63) << 8) | b[0]) + 1
-                height = (((b[3] & 15) << 10) | (b[2] << 2) | ((b[1] & 192) >> 6)) + 1
+        if len(head) >= 2 and head.startswith(b'\377\330'):
+            if isinstance(data, bytes):
+                buf = data
+                chunks = iter(())
             else:
-                raise ValueError('Unsupported WebP file')  # TODO add support for all WebP formats
+                data.seek(0)
+                chunks = iter(partial(data.read, JPEG_READ_SIZE), b'')
+                buf = next(chunks, b'')
+            i = 2
+            while True:
+                # ensure that the buffer contains marker, segment length and possible SOF dimensions
+                while len(buf) < i + 8:
+                    chunk = next(chunks, b'')
+                    if not chunk:
+                        raise ValueError('no SOF marker found in JPEG data')
+                    buf += chunk
+                if buf[i] == 0xff:  # marker prefix or fill byte
+                    i += 1
+                    continue
+                ftype = buf[i]
+                if 0xc0 <= ftype <= 0xcf and ftype not in (0xc4, 0xc8, 0xcc):
+                    height, width = struct.unpack_from('>HH', buf, i + 4)
+                    break
+                i += 1 + struct.unpack_from('>H', buf, i + 1)[0]
+        else:
+            width, height = image_size_from_header(head)
     except Exception as ex:
         logging.debug(ex)
     return width, height
 
 
+@lru_cache(maxsize=64)
+def image_size_from_header(head: bytes) -> Tuple[int, int]:
+    """
+    Extract image width and height from the header of a PNG, GIF, BMP or WebP file
+    """
+    width = -1
+    height = -1
+    size = len(head)
+    # PNG
+    if size >= 24 and head.startswith(PNG_SIGNATURE) and head[12:16] == b'IHDR':
+        width, height = struct.unpack('>LL', head[16:24])
+    elif size >= 16 and head.startswith(PNG_SIGNATURE):
+        width, height = struct.unpack('>LL', head[8:16])
+    # GIF
+    elif size >= 10 and head.startswith((b'GIF87a', b'GIF89a')):
+        width, height = struct.unpack('<HH', head[6:10])
+    # BMP
+    elif size >= 26 and head.startswith(b'BM'):
+        headerSize = struct.unpack('<I', head[14:18])[0]
+        if headerSize == 12:
+            width, height = struct.unpack('<HH', head[18:22])
+        elif headerSize >= 40:
+            width, height = struct.unpack('<ii', head[18:26])
+            height = abs(height)
+        else:
+            raise ValueError('unknown DIB header size: ' + str(headerSize))
+    # WebP
+    elif head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        if head[12:16] == b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+        elif head[12:16] == b'VP8X':
+            width = struct.unpack('<I', head[24:27] + b'\0')[0] + 1
+            height = struct.unpack('<I', head[27:30] + b'\0')[0] + 1
+        elif head[12:16] == b'VP8L':
+            b = head[21:25]
+            width = (((b[1] & 63) << 8) | b[0]) + 1
+            height = (((b[3] & 15) << 10) | (b[2] << 2) | ((b[1] & 192) >> 6)) + 1
+        else:
+            raise ValueError('Unsupported WebP file')  # TODO add support for all WebP formats
+    return width, height
+
+
+@lru_cache(maxsize=16)
+def color_scheme_variables(resource: str, mtime: float) -> dict:
+    """
+    Load the variables from a color scheme resource. The modification time of the file is only
+    used as part of the cache key, so that the resource is loaded again if it was modified.
+    """
+    return sublime.decode_value(sublime.load_resource(resource))['variables']
+
+
 # https://en.wikipedia.org/wiki/Data_URI_scheme#Syntax
-def parse_data_uri(uri: str) -> Tuple[str, bytes]:
+def parse_data_uri(uri: str, size: Optional[int] = None) -> Tuple[str, bytes]:
+    """
+    Returns the mime type and the decoded data of a data URI. If a size is given, only (at least)
+    the first size bytes of the data are decoded.
+    """
     if not uri.startswith('data:') or ',' not in uri:
         raise ValueError('invalid data uri')
     media_type, _, raw_data = uri[5:].partition(',')
+    if size is not None:
+        if media_type.endswith(';base64'):
+            # 4 base64 characters encode 3 bytes; whitespace, e.g. from line wrapping, gets ignored
+            # by the decoder, so it must not be counted
+            length = (size + 2) // 3 * 4
+            end = length
+            chars = ''.join(raw_data[:end].split())
+            while len(chars) < length and end < len(raw_data):
+                end += length - len(chars)
+                chars = ''.join(raw_data[:end].split())
+            raw_data = chars[:length]
+        else:
+            raw_data = raw_data[:3 * size]  # a percent-encoded byte has at most 3 characters
     data = b64decode(raw_data) if media_type.endswith(';base64') else urllib.parse.unquote_to_bytes(raw_data)
     mime = media_type.split(';')[0] if media_type else 'text/plain'
     return mime, data
@@ -494,6 +797,13 @@ class QuickViewHoverListener(sublime_plugin.EventListener):
 class QuickViewCommand(sublime_plugin.TextCommand):
     _active_region = None  # type: Optional[sublime.Region]
 
+    def __init__(self, view: sublime.View) -> None:
+        super().__init__(view)
+        self._definitions = {}  # type: Dict[str, Tuple[int, Dict[str, List[sublime.Region]]]]
+        self._image_preview_count = 0
+        self._running_image_preview = 0
+        self._view_variables = None  # type: Optional[Tuple[int, dict]]
+
     def run(self, edit: sublime.Edit, point: Optional[int] = None) -> None:
         manual = point is None
         empty_selection = True
@@ -515,13 +825,14 @@ class QuickViewCommand(sublime_plugin.TextCommand):
                 return
         elif self._active_region and self._active_region.contains(point):  # prevent flickering on small mouse movements
             return
-        settings = sublime.load_settings(SETTINGS_FILE)
-        if manual and empty_selection or not manual and settings.get('image_preview'):
-            if self.view.match_selector(point, settings.get('image_scope_selector')):
+        # any new request supersedes an image preview that is still loading, even if there is nothing to preview here
+        self._image_preview_count += 1
+        if manual and empty_selection or not manual and SETTINGS.image_preview:
+            if self.view.match_selector(point, SETTINGS.image_scope_selector):
                 region = self.view.extract_scope(point)
                 self.image_preview(region, manual)
                 return
-        if manual and empty_selection or not manual and settings.get('color_preview'):
+        if manual and empty_selection or not manual and SETTINGS.color_preview:
             if self.view.match_selector(point, SCOPE_SELECTOR_CSS_COLORNAME):
                 region = self.view.word(point)
                 self.color_preview_rgb(region)
@@ -562,48 +873,54 @@ class QuickViewCommand(sublime_plugin.TextCommand):
                 return
             # scope for CSS functions should be checked last, because the scope also matches for custom properties
             elif self.view.match_selector(point, SCOPE_SELECTOR_CSS_FUNCTION):
-                regions = self.view.find_by_selector(SCOPE_SELECTOR_CSS_FUNCTION)
-                for region in regions:
-                    if region.contains(point):
-                        logging.debug(self.view.substr(region))
-                        if self.view.match_selector(region.a, 'support.function.color'):
-                            color_tuple = match_color(self.view.substr(region), fullmatch=True)
-                            if color_tuple is not None:
-                                self.color_preview_rgba(region, color_tuple)
-                                return
-                        # elif view.match_selector(region.a, 'support.function.gradient'):
-                        #     if view.substr(region).startswith('linear-gradient'):
-                        #         pass
-                        break
+                if ST_VERSION >= 4130:
+                    function_region = self.view.expand_to_scope(point, SCOPE_SELECTOR_CSS_FUNCTION)
+                else:  # View.expand_to_scope is not available, so search through all CSS functions in the file
+                    function_region = next((r for r in self.view.find_by_selector(SCOPE_SELECTOR_CSS_FUNCTION) if r.contains(point)), None)
+                if function_region:
+                    logging.debug(self.view.substr(function_region))
+                    if self.view.match_selector(function_region.a, 'support.function.color'):
+                        color_tuple = match_color(self.view.substr(function_region), fullmatch=True)
+                        if color_tuple is not None:
+                            self.color_preview_rgba(function_region, color_tuple)
+                    # elif view.match_selector(function_region.a, 'support.function.gradient'):
+                    #     if view.substr(function_region).startswith('linear-gradient'):
+                    #         pass
                 return
         if manual:
             text = self.view.substr(region)  # pyright: ignore[reportUnboundVariable]
             offset = region.begin()  # pyright: ignore[reportUnboundVariable]
-            for m in IMAGE_URI_PATTERN.finditer(text):
+            cursor = point - offset  # pyright: ignore[reportOptionalOperand]
+            color_candidate = None
+            # skip the more expensive search for image URIs if the text can't contain any of them
+            lowercase_text = text.lower()
+            image_uri_possible = any(substring in lowercase_text for substring in IMAGE_URI_SUBSTRINGS)
+            pattern = FALLBACK_PATTERN if image_uri_possible else COLOR_START_PATTERN
+            # walk the text only once to find image URIs and colors, but image URIs take precedence
+            for m in pattern.finditer(text):
                 # if selection is empty ensure cursor position is within the found region
-                if not empty_selection or m.start() <= point - offset <= m.end():  # pyright: ignore[reportUnboundVariable]
+                if empty_selection:
+                    if m.start() > cursor:  # all subsequent matches are located after the cursor position
+                        break
+                    if m.end() < cursor and m.lastgroup == 'image':
+                        continue
+                if m.lastgroup == 'image':
                     link_region = sublime.Region(offset + m.start(), offset + m.end())
                     logging.debug('potential image URI found: %s', self.view.substr(link_region))
                     self.image_preview(region, True)  # pyright: ignore[reportUnboundVariable]
                     return
-            for m in COLOR_START_PATTERN.finditer(text):
-                if not empty_selection or m.start() <= point - offset:  # pyright: ignore[reportUnboundVariable]
-                    mcolor = Color.match(text, start=m.start())
-                    if mcolor is not None and (not empty_selection or point - offset <= mcolor.end):  # pyright: ignore[reportUnboundVariable]
-                        color_region = sublime.Region(offset + mcolor.start, offset + mcolor.end)
-                        mcolor.color.convert('srgb', in_place=True)
-                        r = int(255 * mcolor.color['red'])
-                        g = int(255 * mcolor.color['green'])
-                        b = int(255 * mcolor.color['blue'])
-                        a = mcolor.color['alpha']
-                        self.color_preview_rgba(color_region, (r, g, b, a))
-                        return
+                if color_candidate is None:
+                    result = find_color(text, m.start())
+                    if result is not None and (not empty_selection or cursor <= result[1]):
+                        color_candidate = sublime.Region(offset + m.start(), offset + result[1]), result[0]
+            if color_candidate is not None:
+                self.color_preview_rgba(*color_candidate)
 
     def expand_local_path(self, path: str) -> str:
         directory_path, filename = os.path.split(path)  # don't expand variables within the filename
-        variables = self.view.window().extract_variables()  # pyright: ignore[reportOptionalMemberAccess]
-        for alias, replacement in sublime.load_settings(SETTINGS_FILE).get('path_aliases').items():
+        for alias, replacement in SETTINGS.path_aliases.items():
             if directory_path.startswith(alias):
+                variables = self.view.window().extract_variables()  # pyright: ignore[reportOptionalMemberAccess]
                 replacement = sublime.expand_variables(replacement, variables)
                 directory_path = directory_path.replace(alias, replacement, 1)
                 break
@@ -614,14 +931,13 @@ class QuickViewCommand(sublime_plugin.TextCommand):
             file_name = self.view.file_name()
             return os.path.abspath(os.path.join(os.path.dirname(file_name), full_path)) if file_name else ''
 
-    def popup_content(self, content: str, popup_width: int, popup_border_width: float) -> str:
-        popup_style = sublime.load_settings(SETTINGS_FILE).get('popup_style')
+    def popup_content(self, content: str, popup_width: int, popup_border_width: float, em_scale: float) -> str:
+        popup_style = SETTINGS.popup_style
         bubble = '<div class="preview-bubble bubble-above"></div>' if 'pointer' in popup_style else ''
         popup_border_radius = 0.3 if 'rounded' in popup_style else 0
-        margin = popup_width / 2 - 9 * EM_SCALE_FACTOR * self.view.em_width()
+        margin = popup_width / 2 - 9 * em_scale
         label_top_margin = 1 if ST_VERSION >= 4000 else 0
-        popup_shadows = sublime.load_settings('Preferences.sublime-settings').get('popup_shadows', False)
-        background = 'color(var(--background) lightness(- 1.2%))' if popup_shadows else 'var(--background)'
+        background = 'color(var(--background) lightness(- 1.2%))' if SETTINGS.popup_shadows else 'var(--background)'
         return POPUP_TEMPLATE.format(
             background=background,
             margin=margin,
@@ -659,10 +975,11 @@ class QuickViewCommand(sublime_plugin.TextCommand):
         return self.view.layout_to_text((x, ay)) + horizontal_correction
 
     def show_popup(self, region: sublime.Region, content: str, content_width: float, on_navigate: Optional[Callable] = None) -> None:
-        popup_border_width = sublime.load_settings(SETTINGS_FILE).get('popup_border_width')
-        popup_width = int(content_width + 2 * popup_border_width * EM_SCALE_FACTOR * self.view.em_width())
+        popup_border_width = SETTINGS.popup_border_width
+        em_scale = EM_SCALE_FACTOR * self.view.em_width()
+        popup_width = int(content_width + 2 * popup_border_width * em_scale)
         location = self.popup_location(region, popup_width)
-        content = self.popup_content(content, popup_width, popup_border_width)
+        content = self.popup_content(content, popup_width, popup_border_width, em_scale)
         self.set_active_region(region)
         self.view.show_popup(
             content,
@@ -678,13 +995,16 @@ class QuickViewCommand(sublime_plugin.TextCommand):
         self.show_popup(region, content, content_width)
 
     def show_image_popup(self, region: sublime.Region, width: int, height: int, src: str, title: str) -> None:
+        if self._running_image_preview != self._image_preview_count:
+            logging.debug('image preview was superseded while loading')
+            return
 
         def on_navigate(href: str) -> None:
             sublime.active_window().open_file(href[len('file://'):])
 
         scaled_width, scaled_height = scale_image(width, height, EM_SCALE_FACTOR * self.view.em_width())
         label = image_size_label(width, height)
-        if 'open_image_button' in sublime.load_settings(SETTINGS_FILE).get('popup_style'):
+        if 'open_image_button' in SETTINGS.popup_style:
             if src.startswith('file://') or ST_VERSION >= 4096 and src.startswith('data:'):
                 href = sublime.command_url('quick_view_open_image', {'href': src, 'title': title}) if ST_VERSION >= 4096 else src
                 label += '<span>&nbsp;&nbsp;&nbsp;</span><a class="icon" href="{}" title="Open Image in new Tab">❐</a>'.format(href)
@@ -694,92 +1014,107 @@ class QuickViewCommand(sublime_plugin.TextCommand):
     def image_preview(self, region: sublime.Region, show_errors: bool = False) -> None:
         uri = self.view.substr(region)
         # remove possible string quotes
-        if self.view.match_selector(region.begin(), 'punctuation.definition.string.begin | punctuation.definition.link.begin'):
+        if self.view.match_selector(region.begin(), SCOPE_SELECTOR_URI_BEGIN_PUNCTUATION):
             uri = uri[1:]
-        if self.view.match_selector(region.end() - 1, 'punctuation.definition.string.end | punctuation.definition.link.end'):
+        if self.view.match_selector(region.end() - 1, SCOPE_SELECTOR_URI_END_PUNCTUATION):
             uri = uri[:-1]
         if uri.startswith('data:'):
-            sublime.set_timeout_async(partial(self.data_uri_image_preview, region, uri, show_errors))
+            self.schedule_image_preview(partial(self.data_uri_image_preview, region, uri, show_errors), show_errors)
         else:
             image_format = format_from_uri(uri)
-            settings = sublime.load_settings(SETTINGS_FILE)
             if image_format in CONVERTABLE_IMAGE_FORMATS:
-                valid_converters = {
-                    ImageFormat.SVG: ('inkscape', 'magick'),
-                    ImageFormat.WEBP: ('dwebp', 'magick'),
-                    ImageFormat.AVIF: ('magick')
-                }[image_format]
-                if settings.get(CONVERTER_SETTING[image_format]) not in valid_converters:
+                if SETTINGS.converters[image_format] not in VALID_CONVERTERS[image_format]:
                     if show_errors:
                         self.view.window().status_message('No valid {} converter set in the package settings'.format(IMAGE_FORMAT_NAMES[image_format]))  # pyright: ignore[reportOptionalMemberAccess]
                     return
-            if uri.lower().startswith(('http:', 'https:', 'ftp:')):
-                if image_format in NATIVE_IMAGE_FORMATS + CONVERTABLE_IMAGE_FORMATS or \
-                    not uri.lower().endswith(IGNORED_FILE_EXTENSIONS) and \
-                    (show_errors or settings.get('extensionless_image_preview')):
-                    sublime.set_timeout_async(partial(self.internet_url_image_preview, region, uri, show_errors))
+            is_supported_format = image_format in SUPPORTED_IMAGE_FORMATS
+            uri_lower = uri.lower()
+            if uri_lower.startswith(('http:', 'https:', 'ftp:')):
+                if is_supported_format or \
+                    not uri_lower.endswith(IGNORED_FILE_EXTENSIONS) and \
+                    (show_errors or SETTINGS.extensionless_image_preview):
+                    self.schedule_image_preview(partial(self.internet_url_image_preview, region, uri, show_errors), show_errors)
             elif uri.startswith('file://'):  # local absolute path
-                if image_format in NATIVE_IMAGE_FORMATS + CONVERTABLE_IMAGE_FORMATS:
-                    sublime.set_timeout_async(partial(self.local_path_image_preview, region, uri[len('file://'):], show_errors))
+                if is_supported_format:
+                    self.schedule_image_preview(partial(self.local_path_image_preview, region, uri[len('file://'):], show_errors), show_errors)
             else:  # local relative path
-                if image_format in NATIVE_IMAGE_FORMATS + CONVERTABLE_IMAGE_FORMATS:
-                    sublime.set_timeout_async(partial(self.local_path_image_preview, region, self.expand_local_path(uri), show_errors))
+                if is_supported_format:
+                    self.schedule_image_preview(partial(self.local_path_image_preview, region, self.expand_local_path(uri), show_errors), show_errors)
+
+    def schedule_image_preview(self, callback: Callable[[], None], manual: bool = False) -> None:
+        """
+        Run the image preview on the async thread, unless another image preview was requested
+        in the meantime, e.g. due to fast mouse movements over multiple images. Previews on hover
+        are delayed slightly, so that such fast mouse movements are coalesced. If another preview
+        is requested while the image is loading, show_image_popup skips the outdated popup.
+        """
+        self._image_preview_count += 1
+        image_preview_count = self._image_preview_count
+
+        def run() -> None:
+            if image_preview_count == self._image_preview_count:
+                self._running_image_preview = image_preview_count
+                callback()
+
+        sublime.set_timeout_async(run, 0 if manual else HOVER_IMAGE_PREVIEW_DELAY)
 
     def data_uri_image_preview(self, region: sublime.Region, data_uri: str, show_errors: bool = False) -> None:
         try:
-            mime, data = parse_data_uri(data_uri)
+            # the image size of most native image formats can be extracted from the header only
+            mime, data = parse_data_uri(data_uri, IMAGE_HEADER_SIZE)
+            image_format = MIME_TYPE_FORMAT_MAP.get(mime, ImageFormat.UNSUPPORTED)
+            if image_format == ImageFormat.JPEG or image_format in CONVERTABLE_IMAGE_FORMATS:
+                _, data = parse_data_uri(data_uri)
         except Exception as ex:
             logging.debug(ex)
             if show_errors:
                 self.view.window().status_message('Parsing error for data URI')  # pyright: ignore[reportOptionalMemberAccess]
             return
-        image_format = MIME_TYPE_FORMAT_MAP.get(mime, ImageFormat.UNSUPPORTED)
         image_format_name = IMAGE_FORMAT_NAMES.get(image_format, 'unsupported format')
-        if mime in (MimeType.PNG, MimeType.JPEG, MimeType.GIF, MimeType.BMP):
-            pass
-        elif mime in (MimeType.SVG, MimeType.WEBP, MimeType.AVIF):
-            setting = CONVERTER_SETTING[image_format]
-            converter = sublime.load_settings(SETTINGS_FILE).get(setting)
+        if image_format in NATIVE_IMAGE_FORMATS:
+            width, height = image_size(data)
+        elif image_format in CONVERTABLE_IMAGE_FORMATS:
+            converter = SETTINGS.converters[image_format]
             try:
-                data = convert_bytes2png(data, image_format, converter)
+                data_uri, width, height = converted_data_uri(data, image_format, converter)
             except Exception as ex:
                 logging.debug(ex)
                 if show_errors:
                     self.view.window().status_message('Conversion error for {} data URI'.format(image_format_name))  # pyright: ignore[reportOptionalMemberAccess]
                 return
-            data_base64 = b64encode(data).decode('ascii')
-            data_uri = DATA_URI_TEMPLATE.format(MimeType.PNG, data_base64)
         else:
             if show_errors:
                 self.view.window().status_message('Mime type {} for data URI not supported'.format(mime))  # pyright: ignore[reportOptionalMemberAccess]
             return
-        width, height = image_size(data)
         title = 'data URI image ({})'.format(image_format_name)
         self.show_image_popup(region, width, height, data_uri, title)
 
     def internet_url_image_preview(self, region: sublime.Region, url: str, show_errors: bool = False) -> None:
         logging.debug('potential image URL: %s', url)
-        mime, data = request_img(url)
-        if not mime or not data:
-            if show_errors:
-                self.view.window().status_message('QuickView not possible for URL {}'.format(url))  # pyright: ignore[reportOptionalMemberAccess]
-            return
-        image_format = MIME_TYPE_FORMAT_MAP.get(mime, ImageFormat.UNSUPPORTED)
-        if image_format in CONVERTABLE_IMAGE_FORMATS:
-            converter = sublime.load_settings(SETTINGS_FILE).get(CONVERTER_SETTING[image_format])
-            mime = MimeType.PNG
-            try:
-                data = convert_bytes2png(data, image_format, converter)
-            except Exception as ex:
-                logging.debug(ex)
+        entry = DOWNLOAD_CACHE.get(url)
+        if entry is None:
+            mime, data = request_img(url)
+            if not mime or not data:
                 if show_errors:
-                    self.view.window().status_message('Image conversion error for URL {}'.format(url))  # pyright: ignore[reportOptionalMemberAccess]
+                    self.view.window().status_message('QuickView not possible for URL {}'.format(url))  # pyright: ignore[reportOptionalMemberAccess]
                 return
-        width, height = image_size(data)
+            image_format = MIME_TYPE_FORMAT_MAP.get(mime, ImageFormat.UNSUPPORTED)
+            if image_format in CONVERTABLE_IMAGE_FORMATS:
+                converter = SETTINGS.converters[image_format]
+                mime = MimeType.PNG
+                try:
+                    data = convert_bytes2png(data, image_format, converter)
+                except Exception as ex:
+                    logging.debug(ex)
+                    if show_errors:
+                        self.view.window().status_message('Image conversion error for URL {}'.format(url))  # pyright: ignore[reportOptionalMemberAccess]
+                    return
+            # only successful previews are cached, so that failed downloads are retried on the next hover
+            entry = image_data_uri(mime, data)
+            DOWNLOAD_CACHE.put(url, entry)
+        data_uri, width, height = entry
         parsed = urllib.parse.urlparse(url)
         title = os.path.basename(parsed.path)
-        data_base64 = b64encode(data).decode('ascii')
-        data_uri = DATA_URI_TEMPLATE.format(mime, data_base64)
         self.show_image_popup(region, width, height, data_uri, title)
 
     def local_path_image_preview(self, region: sublime.Region, path: str, show_errors: bool = False) -> None:
@@ -790,17 +1125,14 @@ class QuickViewCommand(sublime_plugin.TextCommand):
         logging.debug('loading local image from %s', path)
         image_format = format_from_uri(path)
         if image_format in CONVERTABLE_IMAGE_FORMATS:
-            converter = sublime.load_settings(SETTINGS_FILE).get({ImageFormat.SVG: 'svg_converter', ImageFormat.WEBP: 'webp_converter', ImageFormat.AVIF: 'avif_converter'}[image_format])
+            converter = SETTINGS.converters[image_format]
             try:
-                data = convert_file2png(path, image_format, converter)
+                src, width, height = converted_file_data_uri(path, image_format, converter)
             except Exception as ex:
                 logging.debug(ex)
                 if show_errors:
                     self.view.window().status_message('Image conversion error for file {}'.format(path))  # pyright: ignore[reportOptionalMemberAccess]
                 return
-            width, height = image_size(data)
-            data_base64 = b64encode(data).decode('ascii')
-            src = DATA_URI_TEMPLATE.format(MimeType.PNG, data_base64)
         else:
             with open(path, 'rb') as data:
                 width, height = image_size(data)
@@ -815,7 +1147,7 @@ class QuickViewCommand(sublime_plugin.TextCommand):
     def color_preview_rgba(self, region: sublime.Region, color_tuple: Tuple[int, int, int, float]) -> None:
         r, g, b, a = color_tuple
         # ensure RGB values are in range 0..255
-        if any([val not in range(0, 256) for val in (r, g, b)]):
+        if (r | g | b) & ~0xff:  # nonzero if any of the values is negative or larger than 255
             logging.debug('invalid RGB color rgb(%i, %i, %i)', r, g, b)
             return
         # ensure alpha value is in range [0, 1]
@@ -823,23 +1155,21 @@ class QuickViewCommand(sublime_plugin.TextCommand):
             logging.debug('invalid alpha value %f', a)
             return
         if a == 1.0:
-            content = '<div class="color-swatch" style="background-color: rgb({}, {}, {})"></div>'.format(r, g, b)
+            content = '<div class="color-swatch" style="background-color: #{:02x}{:02x}{:02x}"></div>'.format(r, g, b)
         else:
-            r0, g0, b0, _ = hex2rgba(self.view.style()['background'])
-            _, lightness, _ = rgb_to_hls(r0/255, g0/255, b0/255)
-            color_scheme_type = 'dark' if lightness < 0.5 else 'light'  # https://www.sublimetext.com/docs/minihtml.html#predefined_classes
+            color_scheme_type = color_scheme_type_from_background(self.view.style()['background'])
             bg_white = BACKGROUND_WHITE_PIXEL[color_scheme_type] * (1 - a)
             bg_black = BACKGROUND_BLACK_PIXEL[color_scheme_type] * (1 - a)
             r1, g1, b1 = int(r * a + bg_white), int(g * a + bg_white), int(b * a + bg_white)
             r2, g2, b2 = int(r * a + bg_black), int(g * a + bg_black), int(b * a + bg_black)
-            data_base64 = checkerboard_png(r1, g1, b1, r2, g2, b2)
+            data_uri = checkerboard_png(r1, g1, b1, r2, g2, b2)
             scaled_width = int(40 * EM_SCALE_FACTOR * self.view.em_width())
-            content = '<img src="data:image/png;base64,{}" width="{}" height="{}" />'.format(data_base64, scaled_width, scaled_width)
+            content = '<img src="{}" width="{}" height="{}" />'.format(data_uri, scaled_width, scaled_width)
         self.show_color_popup(region, content)
 
     def color_preview_css_variable(self, region: sublime.Region, definition_selector: str, show_errors: bool = False) -> None:
         variable_name = self.view.substr(region)
-        definition_regions = [r for r in self.view.find_by_selector(definition_selector) if self.view.substr(r) == variable_name]
+        definition_regions = self.find_definitions(definition_selector).get(variable_name, [])
         # only proceed if there is exactly 1 definition for the variable/custom property, because this implementation is
         # not aware of CSS rule scopes or possible inheritance resulting from the HTML structure
         if len(definition_regions) == 0:
@@ -851,7 +1181,9 @@ class QuickViewCommand(sublime_plugin.TextCommand):
                 self.view.window().status_message('More than one definition found for variable {}'.format(variable_name))  # pyright: ignore[reportOptionalMemberAccess]
             return
         # extract next token
-        a = self.view.find(r'\S', definition_regions[0].b).a
+        definition_end = definition_regions[0].b
+        tail = self.view.substr(sublime.Region(definition_end, min(definition_end + 256, self.view.size())))
+        a = definition_end + len(tail) - len(tail.lstrip())
         msg = 'No valid color could be identified for variable {}'.format(variable_name)
         if self.view.substr(a) != ':':
             if show_errors:
@@ -864,7 +1196,13 @@ class QuickViewCommand(sublime_plugin.TextCommand):
                 self.view.window().status_message(msg)  # pyright: ignore[reportOptionalMemberAccess]
             return
         value_region = sublime.Region(a, b)
-        text = re.split('[;}]', self.view.substr(value_region))[0].strip()
+        text = self.view.substr(value_region)
+        # the value ends at the first semicolon or closing brace
+        for delimiter in ';}':
+            end = text.find(delimiter)
+            if end != -1:
+                text = text[:end]
+        text = text.strip()
         color_tuple = match_color(text, fullmatch=True)
         if color_tuple is None:
             if show_errors:
@@ -877,20 +1215,29 @@ class QuickViewCommand(sublime_plugin.TextCommand):
         variable_name = self.view.substr(region)
         value = None
         if filename:  # search for variable also in overridden files
-            data_path = os.path.dirname(sublime.packages_path())
-            for resource in sublime.find_resources(os.path.basename(filename)):
+            packages_path = sublime.packages_path()
+            if filename.startswith(os.path.join(packages_path, 'User', '')):
+                # the User package is loaded last, so a variable defined in the current view takes precedence anyway
                 try:
-                    is_current_view = os.path.samefile(filename, os.path.join(data_path, resource))
-                    # use buffer content for current view, because there can be unsaved changes
-                    content = sublime.decode_value(self.view.substr(sublime.Region(0, self.view.size()))) if is_current_view else \
-                        sublime.decode_value(sublime.load_resource(resource))
-                    value = content['variables'][variable_name]
+                    value = self.view_color_scheme_variables()[variable_name]
                 except:
                     pass
+            if value is None:
+                data_path = os.path.dirname(packages_path)
+                for resource in sublime.find_resources(os.path.basename(filename)):
+                    try:
+                        resource_path = os.path.join(data_path, resource)
+                        if os.path.samefile(filename, resource_path):
+                            # use buffer content for current view, because there can be unsaved changes
+                            variables = self.view_color_scheme_variables()
+                        else:
+                            variables = color_scheme_variables(resource, os.path.getmtime(resource_path))
+                        value = variables[variable_name]
+                    except:
+                        pass
         else:  # search for variable only in current view
             try:
-                content = sublime.decode_value(self.view.substr(sublime.Region(0, self.view.size())))
-                value = content['variables'][variable_name]
+                value = self.view_color_scheme_variables()[variable_name]
             except:  # TODO try to resolve variable via scope name like in CSS
                 pass
         if isinstance(value, str):
@@ -902,6 +1249,32 @@ class QuickViewCommand(sublime_plugin.TextCommand):
                 return
             self.color_preview_rgba(region, color_tuple)
 
+    def find_definitions(self, selector: str) -> Dict[str, List[sublime.Region]]:
+        """
+        Returns the regions matching the given selector grouped by their text. The result is cached
+        until the content of the view gets modified.
+        """
+        change_count = self.view.change_count()
+        cached = self._definitions.get(selector)
+        if cached is not None and cached[0] == change_count:
+            return cached[1]
+        definitions = {}  # type: Dict[str, List[sublime.Region]]
+        for region in self.view.find_by_selector(selector):
+            definitions.setdefault(self.view.substr(region), []).append(region)
+        self._definitions[selector] = (change_count, definitions)
+        return definitions
+
+    def view_color_scheme_variables(self) -> dict:
+        """
+        Returns the variables from the content of the view, which can contain unsaved changes. The
+        result is cached until the content of the view gets modified.
+        """
+        change_count = self.view.change_count()
+        if self._view_variables is None or self._view_variables[0] != change_count:
+            variables = sublime.decode_value(self.view.substr(sublime.Region(0, self.view.size())))['variables']
+            self._view_variables = (change_count, variables)
+        return self._view_variables[1]
+
     def set_active_region(self, region: sublime.Region) -> None:
         self._active_region = region
 